@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import os
+import json
 import unittest
+import time
 import asyncio
-from unittest.mock import MagicMock
+import tempfile
+import threading
+from io import BytesIO
+from unittest.mock import MagicMock, patch
 from g4f.errors import MissingRequirementsError
+from g4f.cookies import get_cookies_dir, set_cookies_dir
 try:
+    from flask import Flask
     from g4f.gui.server.backend import Backend_Api
     has_requirements = True
 except:
@@ -37,6 +45,36 @@ class TestBackendApi(unittest.TestCase):
         response = self.api.get_providers()
         self.assertIsInstance(response, dict)
         self.assertTrue(len(response) > 0)
+        self.assertIs(response, self.api.get_providers())
+
+    def test_get_providers_matches_uncached(self):
+        from g4f.Provider import __providers__
+        expected = {
+            provider.__name__: (provider.label if hasattr(provider, "label") else provider.__name__)
+            + (" (Image Generation)" if getattr(provider, "image_models", None) else "")
+            + (" (Image Upload)" if getattr(provider, "default_vision_model", None) else "")
+            + (" (WebDriver)" if hasattr(provider, "get_parameters") and "webdriver" in provider.get_parameters() else "")
+            + (" (Auth)" if provider.needs_auth else "")
+            for provider in __providers__
+            if provider.working
+        }
+        self.assertEqual(self.api.get_providers(), expected)
+        self.assertEqual(json.loads(self.api.get_providers_json()), expected)
+
+    def test_provider_models_cache(self):
+        from g4f.gui.server import api
+        with patch.object(api.Api, "_load_provider_models", side_effect=lambda *args: [object()]) as load:
+            api.invalidate_caches()
+            first = api.Api.get_provider_models("Ollama", "secret")
+            self.assertIs(api.Api.get_provider_models("Ollama", "secret"), first)
+            self.assertIsNot(api.Api.get_provider_models("Ollama", "other"), first)
+            self.assertNotIn("secret", str(list(api._models_cache)))
+            with patch.object(api, "MODELS_CACHE_TTL", 0):
+                self.assertIsNot(api.Api.get_provider_models("Ollama", "secret"), first)
+            self.assertEqual(api.Api.get_provider_models("NotAProvider"), [])
+            self.assertNotIn(("NotAProvider", None), api._models_cache)
+            self.assertEqual(load.call_count, 3)
+            api.invalidate_caches()
 
     def test_search(self):
         from g4f.gui.server.internet import search
@@ -47,3 +85,258 @@ class TestBackendApi(unittest.TestCase):
         except MissingRequirementsError:
             self.skipTest("search is not installed")
         self.assertTrue(len(result) >= 4)
+
+class TestResponseStream(unittest.TestCase):
+
+    def setUp(self):
+        if not has_requirements:
+            self.skipTest("gui is not installed")
+
+    def create_stream(self, api, chunks: list):
+        from g4f.providers.base_provider import AbstractProvider
+        class Provider(AbstractProvider):
+            working = True
+            supports_stream = True
+            @classmethod
+            def create_completion(cls, model, messages, stream, **kwargs):
+                yield from chunks
+        kwargs = {"model": "", "provider": Provider, "messages": [], "stream": True}
+        return list(api._create_response_stream(kwargs, "id", "Provider", False))
+
+    def test_dispatch(self):
+        from g4f.image import ImagePreview, ImageResponse
+        from g4f.providers.response import BaseConversation, FinishReason, SynthesizeData
+        class Conversation(BaseConversation):
+            pass
+        api = Backend_Api(MagicMock())
+        chunks = [
+            "Hello", Conversation(), ImagePreview(["a.png"], "cat"), ImageResponse(["b.png"], "cat"),
+            SynthesizeData("Provider", {}), FinishReason("stop"), 42
+        ]
+        messages = [json.loads(message) for message in self.create_stream(api, chunks)]
+        self.assertEqual(
+            [message["type"] for message in messages],
+            ["provider", "content", "conversation", "preview", "content", "synthesize", "content"]
+        )
+        self.assertIn("(a.png)", messages[3]["preview"])
+        self.assertIn("(b.png)", messages[4]["content"])
+        self.assertEqual(messages[-1]["content"], "42")
+
+    def test_subclass_handler(self):
+        from g4f.providers.response import FinishReason
+        class CustomApi(Backend_Api):
+            def _handle_finish_reason(self, chunk, provider, conversation_id):
+                return self._format_json("finish", chunk.reason)
+        messages = self.create_stream(CustomApi(MagicMock()), ["Hello", FinishReason("stop")])
+        self.assertEqual(json.loads(messages[-1]), {"type": "finish", "finish": "stop"})
+
+    def test_empty_stream(self):
+        self.assertEqual(self.create_stream(Backend_Api(MagicMock()), []), [])
+
+class TestFormatJson(unittest.TestCase):
+
+    def setUp(self):
+        if not has_requirements:
+            self.skipTest("gui is not installed")
+        from g4f.gui.server import backend
+        if not backend.has_orjson:
+            self.skipTest("orjson is not installed")
+        self.backend = backend
+        self.api = Backend_Api(MagicMock())
+
+    def test_orjson_matches_json(self):
+        messages = [
+            ("content", "Hello"),
+            ("content", "Grüße, 世界 \U0001F600 \"quoted\"\n"),
+            ("content", "\ud800"),
+            ("provider", {"name": "Copilot", "label": "Microsoft Copilot", "model": "gpt-4"}),
+            ("error", "Copilot: RuntimeError: Überlastet"),
+            ("usage", {1: "non str key", "tokens": 2 ** 70}),
+        ]
+        for response_type, content in messages:
+            fast = self.api._format_json(response_type, content)
+            with patch.object(self.backend, "has_orjson", False):
+                fallback = self.api._format_json(response_type, content)
+            self.assertTrue(fast.endswith(b"\n" if isinstance(fast, bytes) else "\n"))
+            self.assertEqual(json.loads(fast), json.loads(fallback))
+            self.assertEqual(json.loads(fallback)["type"], response_type)
+
+class TestUploadCookies(unittest.TestCase):
+
+    def setUp(self):
+        if not has_requirements:
+            self.skipTest("gui is not installed")
+        self.old_cookies_dir = get_cookies_dir()
+        self.tmp = tempfile.TemporaryDirectory()
+        set_cookies_dir(self.tmp.name)
+        app = Flask(__name__)
+        app.testing = True
+        api = Backend_Api(app)
+        app.add_url_rule("/upload", view_func=api.upload_cookies, methods=["POST"])
+        self.client = app.test_client()
+
+    def tearDown(self):
+        set_cookies_dir(self.old_cookies_dir)
+        self.tmp.cleanup()
+
+    def read(self, filename):
+        with open(os.path.join(self.tmp.name, filename), "rb") as f:
+            return f.read()
+
+    def test_raw_body(self):
+        response = self.client.post("/upload?filename=cookies.json", data=b'{"a": 1}',
+                                    content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read("cookies.json"), b'{"a": 1}')
+
+    def test_raw_body_form_content_type(self):
+        response = self.client.post("/upload?filename=cookies.json", data=b'a=1&b=2',
+                                    content_type="application/x-www-form-urlencoded")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read("cookies.json"), b'a=1&b=2')
+
+    def test_multipart(self):
+        response = self.client.post("/upload", data={"file": (BytesIO(b'{"log": {}}'), "chat.har")},
+                                    content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.read("chat.har"), b'{"log": {}}')
+
+    def test_invalid_filename(self):
+        for filename in ("cookies.txt", ".har", ""):
+            response = self.client.post(f"/upload?filename={filename}", data=b"data")
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_empty_body(self):
+        response = self.client.post("/upload?filename=cookies.json", data=b"")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_too_large(self):
+        with patch("g4f.gui.server.backend.MAX_COOKIES_UPLOAD", 4):
+            response = self.client.post("/upload?filename=cookies.json", data=b"data!")
+            self.assertEqual(response.status_code, 413)
+            # Chunked uploads have no length header, so the size is checked while streaming
+            environ = {"wsgi.input": BytesIO(b"data!"), "wsgi.input_terminated": True}
+            response = self.client.post("/upload?filename=cookies.json", environ_overrides=environ,
+                                        headers={"Transfer-Encoding": "chunked"})
+            self.assertEqual(response.status_code, 413)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_rejected_upload_keeps_file(self):
+        self.client.post("/upload?filename=cookies.json", data=b'{"a": 1}')
+        response = self.client.post("/upload?filename=cookies.json", data=b"")
+        self.assertEqual(response.status_code, 400)
+        with patch("g4f.gui.server.backend.MAX_COOKIES_UPLOAD", 4):
+            environ = {"wsgi.input": BytesIO(b"data!"), "wsgi.input_terminated": True}
+            response = self.client.post("/upload?filename=cookies.json", environ_overrides=environ,
+                                        headers={"Transfer-Encoding": "chunked"})
+            self.assertEqual(response.status_code, 413)
+        self.assertEqual(os.listdir(self.tmp.name), ["cookies.json"])
+        self.assertEqual(self.read("cookies.json"), b'{"a": 1}')
+
+    def test_broken_upload_keeps_file(self):
+        class BrokenStream(BytesIO):
+            def read(self, size=-1):
+                if self.tell():
+                    raise ConnectionResetError()
+                return super().read(4)
+        self.client.post("/upload?filename=cookies.json", data=b'{"a": 1}')
+        environ = {"wsgi.input": BrokenStream(b"data!"), "wsgi.input_terminated": True}
+        with self.assertRaises(ConnectionResetError):
+            self.client.post("/upload?filename=cookies.json", environ_overrides=environ,
+                             headers={"Transfer-Encoding": "chunked"})
+        self.assertEqual(os.listdir(self.tmp.name), ["cookies.json"])
+        self.assertEqual(self.read("cookies.json"), b'{"a": 1}')
+
+PNG_DATA_URI = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
+class FakeContent:
+    def __init__(self, url: str, started: threading.Event):
+        self.url = url
+        self.started = started
+
+    async def iter_any(self):
+        yield b"\x89PNG\r\n\x1a\n" + b"0" * 100
+        if self.url.endswith("broken"):
+            raise ConnectionResetError()
+        if self.url.endswith("hang"):
+            self.started.set()
+            await asyncio.sleep(3600)
+        await asyncio.sleep(0.2)
+        yield b"0" * 100
+
+class FakeResponse:
+    def __init__(self, content: FakeContent):
+        self.content = content
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+class FakeSession:
+    def __init__(self):
+        self.started = threading.Event()
+
+    def get(self, url, cookies=None):
+        return FakeResponse(FakeContent(url, self.started))
+
+class TestCopyImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch("g4f.image.images_dir", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_broken_download_removes_file(self):
+        from g4f.image import copy_image
+        with self.assertRaises(ConnectionResetError):
+            asyncio.run(copy_image(FakeSession(), "https://example.com/broken"))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_copy_images_keeps_order(self):
+        from g4f.image import copy_images
+        images = ["https://example.com/slow", PNG_DATA_URI, PNG_DATA_URI]
+        result = asyncio.run(copy_images(images, session=FakeSession()))
+        self.assertEqual(len(set(result)), 3)
+        names = sorted(os.listdir(self.tmp.name), key=lambda name: int(name.split("_")[0], 16))
+        # The slow download is started first, so its file has the lowest counter
+        self.assertEqual([os.path.basename(image) for image in result], names)
+
+    def start_image_stream(self, images: list[str], session: FakeSession):
+        if not has_requirements:
+            self.skipTest("gui is not installed")
+        from g4f.image import ImageResponse
+        from g4f.gui.server import api
+        async def get_image_session():
+            return session, asyncio.Semaphore(8)
+        patcher = patch.object(api, "get_image_session", get_image_session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return Backend_Api(MagicMock())._handle_image_response(ImageResponse(images, "cat"), True)
+
+    def test_preview_keeps_numbering(self):
+        stream = self.start_image_stream(["https://example.com/slow", PNG_DATA_URI], FakeSession())
+        messages = [json.loads(message) for message in stream]
+        self.assertEqual([message["type"] for message in messages], ["preview", "preview", "content"])
+        first, second, content = [message[message["type"]] for message in messages]
+        self.assertNotIn("#1 cat", first)
+        self.assertIn("#2 cat", first)
+        self.assertEqual(second, content)
+        self.assertEqual(content.count("cat]"), 2)
+
+    def test_close_cancels_copies(self):
+        session = FakeSession()
+        stream = self.start_image_stream([PNG_DATA_URI, "https://example.com/hang"], session)
+        self.assertEqual(json.loads(next(stream))["type"], "preview")
+        self.assertTrue(session.started.wait(5))
+        stream.close()
+        # The cancelled copy removes its partial file on the background loop
+        deadline = time.monotonic() + 5
+        while len(os.listdir(self.tmp.name)) > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
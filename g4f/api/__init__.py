@@ -39,7 +39,7 @@ import g4f.debug
 from g4f.client import AsyncClient, ChatCompletion, ImagesResponse, convert_to_provider
 from g4f.providers.response import BaseConversation
 from g4f.client.helper import filter_none
-from g4f.image import is_accepted_format, is_data_uri_an_image, images_dir
+from g4f.image import is_accepted_format, is_data_uri_an_image, images_dir, MEDIA_TYPE_MAP
 from g4f.typing import Messages
 from g4f.errors import ProviderNotFoundError, ModelNotFoundError, MissingAuthError
 from g4f.cookies import read_cookie_files, get_cookies_dir
@@ -467,8 +467,11 @@ class Api:
             if not os.path.isfile(target):
                 return Response(status_code=404)
 
-            with open(target, "rb") as f:
-                content_type = is_accepted_format(f.read(12))
+            # Copied images are named after their sniffed format
+            content_type = MEDIA_TYPE_MAP.get(os.path.splitext(filename)[1][1:])
+            if content_type is None:
+                with open(target, "rb") as f:
+                    content_type = is_accepted_format(f.read(12))
 
             return FileResponse(target, media_type=content_type)
 
@@ -1364,11 +1364,9 @@ fileInput.addEventListener('click', async (event) => {
 
 async function upload_cookies() {
     const file = fileInput.files[0];
-    const formData = new FormData();
-    formData.append('file', file);
-    response = await fetch("/backend-api/v2/upload_cookies", {
+    response = await fetch(`/backend-api/v2/upload_cookies?filename=${encodeURIComponent(file.name)}`, {
         method: 'POST',
-        body: formData,
+        body: file,
     });
     if (response.status == 200) {
         inputCount.innerText = `${file.name} was uploaded successfully`;
@@ -1,24 +1,157 @@
 from __future__ import annotations
 
 import logging
+import json
 import os
+import atexit
 import asyncio
+import threading
+import time
+import hashlib
+from collections import deque
+from contextvars import ContextVar
 from typing import Iterator
+from itertools import chain
+from queue import Queue
+from aiohttp import ClientSession, TCPConnector, DummyCookieJar
 from flask import send_from_directory
 from inspect import signature
 
 from g4f import version, models
 from g4f import get_last_provider, ChatCompletion
+from g4f.typing import Optional, Cookies
 from g4f.errors import VersionNotFoundError
-from g4f.image import ImagePreview, ImageResponse, copy_images, ensure_images_dir, images_dir
+from g4f.image import ImagePreview, ImageResponse, iter_copy_images, images_dir
 from g4f.Provider import ProviderType, __providers__, __map__
 from g4f.providers.base_provider import ProviderModelMixin
 from g4f.providers.response import BaseConversation, FinishReason, SynthesizeData
 from g4f.client.service import convert_to_provider
+from g4f.requests.aiohttp import get_connector
 from g4f import debug
 
 logger = logging.getLogger(__name__)
 conversations: dict[dict[str, BaseConversation]] = {}
+_no_chunk = object()
+
+# Collects debug logs for the response stream running in the current context.
+# Tasks on the provider's event loop inherit that context, executor threads
+# (loop.run_in_executor) don't: their log lines are printed, not streamed.
+_stream_logs: ContextVar[Optional[deque]] = ContextVar("stream_logs", default=None)
+_print_callback = debug.log_handler
+
+def log_handler(text: str):
+    logs = _stream_logs.get()
+    if logs is not None:
+        logs.append(text)
+    _print_callback(text)
+
+debug.log_handler = log_handler
+
+# Create the images directory once instead of checking it on every request
+try:
+    os.makedirs(images_dir, exist_ok=True)
+except OSError:
+    pass
+_images_dir = os.path.abspath(images_dir)
+_provider_meta: dict[str, dict] = {}
+_providers_cache: dict[str, str] = {}
+_providers_json: str = "{}"
+
+def get_provider_meta(provider: ProviderType) -> dict:
+    label = getattr(provider, "label", None)
+    get_parameters = getattr(provider, "get_parameters", None)
+    return {
+        "label": provider.__name__ if label is None else label,
+        "has_image_models": bool(getattr(provider, "image_models", None)),
+        "has_vision": bool(getattr(provider, "default_vision_model", None)),
+        "needs_webdriver": get_parameters is not None and "webdriver" in get_parameters(),
+        "needs_auth": provider.needs_auth,
+        "working": provider.working,
+        "url": provider.url,
+        "parent": getattr(provider, "parent", None),
+    }
+
+def get_provider_label(meta: dict) -> str:
+    return (
+        f'{meta["label"]}'
+        f'{" (Image Generation)" if meta["has_image_models"] else ""}'
+        f'{" (Image Upload)" if meta["has_vision"] else ""}'
+        f'{" (WebDriver)" if meta["needs_webdriver"] else ""}'
+        f'{" (Auth)" if meta["needs_auth"] else ""}'
+    )
+
+def load_provider_meta() -> None:
+    """Collects the provider capabilities once, so requests only do dict lookups."""
+    global _provider_meta, _providers_cache, _providers_json
+    _provider_meta = {provider.__name__: get_provider_meta(provider) for provider in __providers__}
+    _providers_cache = {
+        name: get_provider_label(meta)
+        for name, meta in _provider_meta.items()
+        if meta["working"]
+    }
+    # Sorted like flask.jsonify
+    _providers_json = json.dumps(_providers_cache, sort_keys=True)
+
+# Model lists are fetched from the providers, some of them (e.g. Ollama)
+# change at runtime, so entries expire after MODELS_CACHE_TTL seconds.
+MODELS_CACHE_TTL = 600
+MODELS_CACHE_SIZE = 256
+_models_cache: dict[tuple[str, Optional[str]], tuple[float, list]] = {}
+_models_cache_lock = threading.Lock()
+
+def invalidate_caches() -> None:
+    """Rebuild the cached provider lists, e.g. after providers were reloaded."""
+    load_provider_meta()
+    with _models_cache_lock:
+        _models_cache.clear()
+
+# Image copies share one long-lived loop, because a ClientSession
+# is bound to the loop it was created on.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+# Sessions are keyed on the proxy, so changes to G4F_PROXY are picked up.
+_image_sessions: dict[Optional[str], ClientSession] = {}
+_image_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+            atexit.register(_stop_background_loop)
+    return _loop
+
+async def get_image_session() -> tuple[ClientSession, asyncio.Semaphore]:
+    """Returns the shared session and download limit, must run on the background loop."""
+    global _image_semaphore
+    if _image_semaphore is None:
+        _image_semaphore = asyncio.Semaphore(8)
+    proxy = os.environ.get("G4F_PROXY")
+    session = _image_sessions.get(proxy)
+    if session is None or session.closed:
+        connector = get_connector(proxy=proxy)
+        if connector is None:
+            # Pool and reuse connections, most images come from a few hosts
+            connector = TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300)
+        # Cookies are passed per request, so the session can be shared.
+        session = ClientSession(connector=connector, cookie_jar=DummyCookieJar())
+        _image_sessions[proxy] = session
+    return session, _image_semaphore
+
+async def close_image_sessions() -> None:
+    for session in _image_sessions.values():
+        if not session.closed:
+            await session.close()
+    _image_sessions.clear()
+
+def _stop_background_loop() -> None:
+    if _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(close_image_sessions(), _loop).result(5)
+        except Exception as e:
+            logger.warning(f"Failed to close image sessions: {type(e).__name__}: {e}")
+        _loop.call_soon_threadsafe(_loop.stop)
 
 class Api:
     @staticmethod
@@ -27,35 +160,55 @@ class Api:
 
     @staticmethod
     def get_provider_models(provider: str, api_key: str = None):
-        if provider in __map__:
-            provider: ProviderType = __map__[provider]
-            if issubclass(provider, ProviderModelMixin):
-                if api_key is not None and "api_key" in signature(provider.get_models).parameters:
-                    models = provider.get_models(api_key=api_key)
-                else:
-                    models = provider.get_models()
-                return [
-                    {
-                        "model": model,
-                        "default": model == provider.default_model,
-                        "vision": getattr(provider, "default_vision_model", None) == model or model in getattr(provider, "vision_models", []),
-                        "image": False if provider.image_models is None else model in provider.image_models,
-                    }
-                    for model in models
-                ]
+        if provider not in __map__:
+            # Unknown names would take cache slots from real providers
+            return []
+        # Only a hash of the api key is kept in memory
+        key = (provider, None if api_key is None else hashlib.sha256(api_key.encode()).hexdigest())
+        now = time.monotonic()
+        with _models_cache_lock:
+            cached = _models_cache.get(key)
+        if cached is not None and now - cached[0] < MODELS_CACHE_TTL:
+            return cached[1]
+        models = Api._load_provider_models(provider, api_key)
+        with _models_cache_lock:
+            _models_cache.pop(key, None)
+            if len(_models_cache) >= MODELS_CACHE_SIZE:
+                del _models_cache[next(iter(_models_cache))]
+            _models_cache[key] = (now, models)
+        return models
+
+    @staticmethod
+    def _load_provider_models(provider: str, api_key: str = None) -> list:
+        provider: ProviderType = __map__[provider]
+        if issubclass(provider, ProviderModelMixin):
+            if api_key is not None and "api_key" in signature(provider.get_models).parameters:
+                models = provider.get_models(api_key=api_key)
+            else:
+                models = provider.get_models()
+            default_model = provider.default_model
+            default_vision_model = getattr(provider, "default_vision_model", None)
+            vision_models = getattr(provider, "vision_models", [])
+            image_models = provider.image_models
+            return [
+                {
+                    "model": model,
+                    "default": model == default_model,
+                    "vision": default_vision_model == model or model in vision_models,
+                    "image": False if image_models is None else model in image_models,
+                }
+                for model in models
+            ]
         return []
 
     @staticmethod
     def get_providers() -> dict[str, str]:
-        return {
-            provider.__name__: (provider.label if hasattr(provider, "label") else provider.__name__)
-            + (" (Image Generation)" if getattr(provider, "image_models", None) else "")
-            + (" (Image Upload)" if getattr(provider, "default_vision_model", None) else "")
-            + (" (WebDriver)" if "webdriver" in provider.get_parameters() else "")
-            + (" (Auth)" if provider.needs_auth else "")
-            for provider in __providers__
-            if provider.working
-        }
+        """Returns the shared provider labels, the dict must not be mutated."""
+        return _providers_cache
+
+    @staticmethod
+    def get_providers_json() -> str:
+        return _providers_json
 
     @staticmethod
     def get_version() -> dict:
@@ -69,8 +222,16 @@ class Api:
         }
 
     def serve_images(self, name):
-        ensure_images_dir()
-        return send_from_directory(os.path.abspath(images_dir), name)
+        return send_from_directory(_images_dir, name)
+
+    async def _copy_images(self, images: list[str], cookies: Optional[Cookies], queue: Queue) -> None:
+        """Copies the images and puts (index, url) into the queue as each one completes."""
+        session, semaphore = await get_image_session()
+        try:
+            async for item in iter_copy_images(images, session, cookies, semaphore):
+                queue.put(item)
+        finally:
+            queue.put(None)
 
     def _prepare_conversation_kwargs(self, json_data: dict, kwargs: dict):
         model = json_data.get('model') or models.default
@@ -108,53 +269,93 @@ class Api:
         }
 
     def _create_response_stream(self, kwargs: dict, conversation_id: str, provider: str, download_images: bool = True) -> Iterator:
-        debug.logs = []
-        print_callback = debug.log_handler
-        def log_handler(text: str):
-            debug.logs.append(text)
-            print_callback(text)
-        debug.log_handler = log_handler
+        logs = deque()
+        token = _stream_logs.set(logs)
         try:
             result = ChatCompletion.create(**kwargs)
-            first = True
             if isinstance(result, ImageResponse):
-                if first:
-                    first = False
-                    yield self._format_json("provider", get_last_provider(True))
+                yield self._format_json("provider", get_last_provider(True))
                 yield self._format_json("content", str(result))
             else:
-                for chunk in result:
-                    if first:
-                        first = False
-                        yield self._format_json("provider", get_last_provider(True))
-                    if isinstance(chunk, BaseConversation):
-                        if provider:
-                            if provider not in conversations:
-                                conversations[provider] = {}
-                            conversations[provider][conversation_id] = chunk
-                            yield self._format_json("conversation", conversation_id)
-                    elif isinstance(chunk, Exception):
-                        logger.exception(chunk)
-                        yield self._format_json("message", get_error_message(chunk))
-                    elif isinstance(chunk, ImagePreview):
-                        yield self._format_json("preview", chunk.to_string())
-                    elif isinstance(chunk, ImageResponse):
-                        images = chunk
-                        if download_images:
-                            images = asyncio.run(copy_images(chunk.get_list(), chunk.options.get("cookies")))
-                            images = ImageResponse(images, chunk.alt)
-                        yield self._format_json("content", str(images))
-                    elif isinstance(chunk, SynthesizeData):
-                        yield self._format_json("synthesize", chunk.to_json())
-                    elif not isinstance(chunk, FinishReason):
-                        yield self._format_json("content", str(chunk))
-                    if debug.logs:
-                        for log in debug.logs:
-                            yield self._format_json("log", str(log))
-                        debug.logs = []
+                chunks = iter(result)
+                first = next(chunks, _no_chunk)
+                if first is not _no_chunk:
+                    # The last provider is known once the first chunk arrived.
+                    yield self._format_json("provider", get_last_provider(True))
+                    chunks = chain((first,), chunks)
+                for chunk in chunks:
+                    if type(chunk) is str:
+                        yield self._format_json("content", chunk)
+                    else:
+                        handler = get_chunk_handler(type(chunk))
+                        if handler == "_handle_image_response":
+                            # Emits several messages, one preview per copied image
+                            yield from self._handle_image_response(chunk, download_images)
+                        else:
+                            message = getattr(self, handler)(chunk, provider, conversation_id)
+                            if message is not None:
+                                yield message
+                    while logs:
+                        yield self._format_json("log", str(logs.popleft()))
         except Exception as e:
             logger.exception(e)
             yield self._format_json('error', get_error_message(e))
+        finally:
+            try:
+                _stream_logs.reset(token)
+            except ValueError:
+                # Closed from another context
+                pass
+
+    def _handle_conversation(self, chunk: BaseConversation, provider: str, conversation_id: str):
+        if provider:
+            if provider not in conversations:
+                conversations[provider] = {}
+            conversations[provider][conversation_id] = chunk
+            return self._format_json("conversation", conversation_id)
+
+    def _handle_exception(self, chunk: Exception, provider: str, conversation_id: str):
+        logger.exception(chunk)
+        return self._format_json("message", get_error_message(chunk))
+
+    def _handle_image_preview(self, chunk: ImagePreview, provider: str, conversation_id: str):
+        return self._format_json("preview", chunk.to_string())
+
+    def _handle_image_response(self, chunk: ImageResponse, download_images: bool) -> Iterator:
+        """Emits a preview per copied image, followed by the content with all copies."""
+        if not download_images:
+            yield self._format_json("content", str(chunk))
+            return
+        queue = Queue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._copy_images(chunk.get_list(), chunk.options.get("cookies"), queue),
+            get_background_loop()
+        )
+        # Pending images stay None, so previews keep the original numbering
+        copied = [None] * len(chunk.get_list())
+        try:
+            while True:
+                item = queue.get()
+                if item is None:
+                    break
+                idx, image = item
+                copied[idx] = image
+                yield self._format_json("preview", ImagePreview(copied, chunk.alt).to_string())
+            # Raise the first copy error, if any
+            future.result()
+        finally:
+            # Stop pending downloads if the client went away
+            future.cancel()
+        yield self._format_json("content", str(ImageResponse(copied, chunk.alt)))
+
+    def _handle_synthesize(self, chunk: SynthesizeData, provider: str, conversation_id: str):
+        return self._format_json("synthesize", chunk.to_json())
+
+    def _handle_finish_reason(self, chunk: FinishReason, provider: str, conversation_id: str):
+        return None
+
+    def _handle_content(self, chunk, provider: str, conversation_id: str):
+        return self._format_json("content", str(chunk))
 
     def _format_json(self, response_type: str, content):
         return {
@@ -162,6 +363,31 @@ class Api:
             response_type: content
         }
 
+# Handler method names by chunk type, resolved on the instance so subclasses can override them.
+# Each handler returns one message or None, except _handle_image_response which emits several.
+# Ordered by priority: ImagePreview must be matched before ImageResponse.
+_chunk_handlers: dict[type, str] = {
+    BaseConversation: "_handle_conversation",
+    ImagePreview: "_handle_image_preview",
+    ImageResponse: "_handle_image_response",
+    SynthesizeData: "_handle_synthesize",
+    FinishReason: "_handle_finish_reason",
+    Exception: "_handle_exception",
+}
+_resolved_chunk_handlers: dict[type, str] = dict(_chunk_handlers)
+
+def get_chunk_handler(chunk_type: type) -> str:
+    name = _resolved_chunk_handlers.get(chunk_type)
+    if name is None:
+        name = next(
+            (name for base, name in _chunk_handlers.items() if issubclass(chunk_type, base)),
+            "_handle_content"
+        )
+        _resolved_chunk_handlers[chunk_type] = name
+    return name
+
+load_provider_meta()
+
 def get_error_message(exception: Exception) -> str:
     message = f"{type(exception).__name__}: {exception}"
     provider = get_last_provider()
@@ -3,9 +3,15 @@ import flask
 import os
 import logging
 import asyncio
+import tempfile
 from flask import Flask, request, jsonify
-from typing import Generator
+from typing import Generator, Union
 from werkzeug.utils import secure_filename
+try:
+    import orjson
+    has_orjson = True
+except ImportError:
+    has_orjson = False
 
 from g4f.image import is_allowed_extension, to_image
 from g4f.client.service import convert_to_provider
@@ -16,6 +22,8 @@ from .api import Api
 
 logger = logging.getLogger(__name__)
 
+MAX_COOKIES_UPLOAD = 50 * 1024 * 1024
+
 def safe_iter_generator(generator: Generator) -> Generator:
     start = next(generator)
     def iter_generator():
@@ -42,6 +50,10 @@ class Backend_Api(Api):
             app (Flask): Flask application instance to attach routes to.
         """
         self.app: Flask = app
+        try:
+            os.makedirs(get_cookies_dir(), exist_ok=True)
+        except OSError:
+            pass
 
         def jsonify_models(**kwargs):
             response = self.get_models(**kwargs)
@@ -55,6 +67,9 @@ class Backend_Api(Api):
                 return jsonify(response)
             return response
 
+        def jsonify_providers():
+            return self.app.response_class(self.get_providers_json(), mimetype="application/json")
+
         self.routes = {
             '/backend-api/v2/models': {
                 'function': jsonify_models,
@@ -65,7 +80,7 @@ class Backend_Api(Api):
                 'methods': ['GET']
             },
             '/backend-api/v2/providers': {
-                'function': self.get_providers,
+                'function': jsonify_providers,
                 'methods': ['GET']
             },
             '/backend-api/v2/version': {
@@ -91,16 +106,51 @@ class Backend_Api(Api):
         }
 
     def upload_cookies(self):
-        file = None
-        if "file" in request.files:
-            file = request.files['file']
-            if file.filename == '':
+        """
+        Saves an uploaded .har or .json file to the cookies directory.
+
+        The file is expected as the raw request body with its name in the
+        "filename" query argument, so it is streamed straight to disk
+        without multipart parsing. Multipart uploads are still accepted.
+        Uploads larger than 50 MB or without content are rejected.
+        """
+        if request.content_length is not None and request.content_length > MAX_COOKIES_UPLOAD:
+            return 'File too large', 413
+        if request.mimetype == "multipart/form-data":
+            if "file" not in request.files:
                 return 'No selected file', 400
-        if file and file.filename.endswith(".json") or file.filename.endswith(".har"):
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(get_cookies_dir(), filename))
+            file = request.files['file']
+            filename = file.filename
+            stream = file.stream
+        else:
+            filename = request.args.get("filename", "")
+            stream = request.stream
+        filename = secure_filename(filename or "")
+        if filename == '':
+            return 'No selected file', 400
+        if not filename.endswith(".json") and not filename.endswith(".har"):
+            return 'Not supported file', 400
+        file_path = os.path.join(get_cookies_dir(), filename)
+        # Write to a temporary file, so a rejected or broken upload keeps the saved one
+        dst = tempfile.NamedTemporaryFile(dir=get_cookies_dir(), suffix=".tmp", delete=False)
+        try:
+            size = 0
+            with dst:
+                while True:
+                    chunk = stream.read(65536)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > MAX_COOKIES_UPLOAD:
+                        return 'File too large', 413
+                    dst.write(chunk)
+            if size == 0:
+                return 'Empty file', 400
+            os.replace(dst.name, file_path)
             return "File saved", 200
-        return 'Not supported file', 400
+        finally:
+            if os.path.exists(dst.name):
+                os.remove(dst.name)
 
     def handle_conversation(self):
         """
@@ -159,7 +209,7 @@ class Backend_Api(Api):
             return "Provider not found", 404
         return models
 
-    def _format_json(self, response_type: str, content) -> str:
+    def _format_json(self, response_type: str, content) -> Union[str, bytes]:
         """
         Formats and returns a JSON response.
 
@@ -168,6 +218,21 @@ class Backend_Api(Api):
             content: The content to be included in the response.
 
         Returns:
-            str: A JSON formatted string.
+            Union[str, bytes]: A JSON formatted line, as bytes if orjson is installed.
         """
-        return json.dumps(super()._format_json(response_type, content)) + "\n"
\ No newline at end of file
+        # Skip building a dict for the most common chunk type
+        if response_type == "content" and type(content) is str:
+            if has_orjson:
+                try:
+                    return b'{"type":"content","content":' + orjson.dumps(content) + b'}\n'
+                except TypeError:
+                    pass
+            return '{"type": "content", "content": ' + json.dumps(content) + '}\n'
+        message = super()._format_json(response_type, content)
+        if has_orjson:
+            # orjson rejects what json accepts, e.g. integers over 64 bits or lone surrogates
+            try:
+                return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+            except TypeError:
+                pass
+        return json.dumps(message) + "\n"
\ No newline at end of file
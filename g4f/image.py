@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import os
 import re
-import time
-import uuid
+import secrets
+import itertools
 from io import BytesIO
 import base64
 import asyncio
+from typing import BinaryIO
 from aiohttp import ClientSession
 
 try:
@@ -16,7 +17,7 @@ try:
 except ImportError:
     has_requirements = False
 
-from .typing import ImageType, Union, Image, Optional, Cookies
+from .typing import ImageType, Union, Image, Optional, Cookies, AsyncIterator
 from .errors import MissingRequirementsError
 from .providers.response import ResponseType
 from .requests.aiohttp import get_connector
@@ -30,8 +31,11 @@ EXTENSIONS_MAP: dict[str, str] = {
     "image/webp": "webp",
 }
 
+MEDIA_TYPE_MAP: dict[str, str] = {extension: media_type for media_type, extension in EXTENSIONS_MAP.items()}
+
 # Define the directory for generated images
 images_dir = "./generated_images"
+_image_counter = itertools.count()
 
 def fix_url(url: str) -> str:
     """ replace ' ' by '+' (to be markdown compliant)"""
@@ -222,7 +226,7 @@ def format_images_markdown(images: Union[str, list], alt: str, preview: Union[st
     Formats the given images as a markdown string.
 
     Args:
-        images: The images to format.
+        images: The images to format. None entries in a list are skipped but keep their number.
         alt (str): The alt for the images.
         preview (str, optional): The preview URL format. Defaults to "{image}?w=200&h=200".
 
@@ -233,10 +237,11 @@ def format_images_markdown(images: Union[str, list], alt: str, preview: Union[st
         result = f"[![{fix_title(alt)}]({fix_url(preview.replace('{image}', images) if preview else images)})]({fix_url(images)})"
     else:
         if not isinstance(preview, list):
-            preview = [preview.replace('{image}', image) if preview else image for image in images]
+            preview = [preview.replace('{image}', image) if preview and image else image for image in images]
         result = "\n".join(
             f"[![#{idx+1} {fix_title(alt)}]({fix_url(preview[idx])})]({fix_url(image)})"
             for idx, image in enumerate(images)
+            if image is not None
         )
     start_flag = "<!-- generated images start -->\n"
     end_flag = "<!-- generated images end -->\n"
@@ -274,35 +279,104 @@ def to_data_uri(image: ImageType) -> str:
 
 # Function to ensure the images directory exists
 def ensure_images_dir():
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)
+    os.makedirs(images_dir, exist_ok=True)
+
+def write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
 
-async def copy_images(images: list[str], cookies: Optional[Cookies] = None, proxy: Optional[str] = None):
+def discard_file(path: str, f: Optional[BinaryIO] = None) -> None:
+    try:
+        if f is not None:
+            f.close()
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+async def copy_image(session: ClientSession, image: str, cookies: Optional[Cookies] = None) -> str:
+    target = os.path.join(images_dir, f"{next(_image_counter):x}_{secrets.token_hex(6)}")
+    # File I/O runs in the executor to not block other downloads on the loop
+    loop = asyncio.get_running_loop()
+    if image.startswith("data:"):
+        data = extract_data_uri(image)
+        target = f"{target}.{EXTENSIONS_MAP[is_accepted_format(data)]}"
+        try:
+            await loop.run_in_executor(None, write_file, target, data)
+        except BaseException:
+            await loop.run_in_executor(None, discard_file, target)
+            raise
+    else:
+        async with session.get(image, cookies=cookies) as response:
+            chunks = response.content.iter_any()
+            # Sniff the format from the first bytes to open the final file directly
+            header = b""
+            async for chunk in chunks:
+                header += chunk
+                if len(header) >= 12:
+                    break
+            target = f"{target}.{EXTENSIONS_MAP[is_accepted_format(header)]}"
+            # Opened here, a handle opened in the executor leaks if the task is cancelled meanwhile
+            f = open(target, "wb")
+            try:
+                buffer = bytearray(header)
+                async for chunk in chunks:
+                    buffer += chunk
+                    if len(buffer) >= 65536:
+                        await loop.run_in_executor(None, f.write, buffer)
+                        buffer = bytearray()
+                await loop.run_in_executor(None, f.write, buffer)
+            except BaseException:
+                # Don't leave a truncated image behind, it would be served
+                await loop.run_in_executor(None, discard_file, target, f)
+                raise
+            await loop.run_in_executor(None, f.close)
+    return f"/images/{os.path.basename(target)}"
+
+async def iter_copy_images(
+    images: list[str],
+    session: ClientSession,
+    cookies: Optional[Cookies] = None,
+    semaphore: Optional[asyncio.Semaphore] = None
+) -> AsyncIterator[tuple[int, str]]:
+    """
+    Copies the images and yields (index, url) as soon as each one is done,
+    so the fastest download is available first.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(8)
+    async def copy(idx: int, image: str) -> tuple[int, str]:
+        async with semaphore:
+            return idx, await copy_image(session, image, cookies)
+    tasks = [asyncio.ensure_future(copy(idx, image)) for idx, image in enumerate(images)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # On error or cancellation stop the other downloads and collect their results
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def copy_images(
+    images: list[str],
+    cookies: Optional[Cookies] = None,
+    proxy: Optional[str] = None,
+    session: Optional[ClientSession] = None
+):
     ensure_images_dir()
-    async with ClientSession(
-        connector=get_connector(
-            proxy=os.environ.get("G4F_PROXY") if proxy is None else proxy
-        ),
-        cookies=cookies
-    ) as session:
-        async def copy_image(image: str) -> str:
-            target = os.path.join(images_dir, f"{int(time.time())}_{str(uuid.uuid4())}")
-            if image.startswith("data:"):
-                with open(target, "wb") as f:
-                    f.write(extract_data_uri(image))
-            else:
-                async with session.get(image) as response:
-                    with open(target, "wb") as f:
-                        async for chunk in response.content.iter_chunked(4096):
-                            f.write(chunk)
-            with open(target, "rb") as f:
-                extension = is_accepted_format(f.read(12)).split("/")[-1]
-                extension = "jpg" if extension == "jpeg" else extension
-            new_target = f"{target}.{extension}"
-            os.rename(target, new_target)
-            return f"/images/{os.path.basename(new_target)}"
-
-        return await asyncio.gather(*[copy_image(image) for image in images])
+    if session is None:
+        async with ClientSession(
+            connector=get_connector(
+                proxy=os.environ.get("G4F_PROXY") if proxy is None else proxy
+            )
+        ) as session:
+            return await copy_images(images, cookies, session=session)
+    copied = {}
+    async for idx, image in iter_copy_images(images, session, cookies):
+        copied[idx] = image
+    return [copied[idx] for idx in range(len(images))]
 
 class ImageResponse(ResponseType):
     def __init__(
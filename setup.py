@@ -28,6 +28,7 @@ EXTRA_REQUIRE = {
         "pillow",                  # image
         "cairosvg",                # svg image
         "werkzeug", "flask",       # gui
+        "orjson",                  # gui
         "fastapi",                 # api
         "uvicorn",                 # api
         "nodriver",
@@ -69,7 +70,7 @@ EXTRA_REQUIRE = {
         "python-multipart",
     ],
     "gui": [
-        "werkzeug", "flask",
+        "werkzeug", "flask", "orjson",
         "beautifulsoup4", "pillow",
         "duckduckgo-search>=5.0",
         "browser_cookie3",